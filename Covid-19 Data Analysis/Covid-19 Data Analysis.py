@@ -1,13 +1,24 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import requests
-import json
+import orjson
+import xxhash
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import matplotlib.dates as mdates
-from matplotlib.gridspec import GridSpec
+from diskcache import Cache
+
+# Country columns used downstream and their dtypes
+COUNTRY_COLS = ['country', 'cases', 'deaths', 'recovered', 'active', 'critical',
+                'todayCases', 'todayDeaths', 'continent']
+DTYPES = {'country': 'string', 'cases': 'int64', 'deaths': 'int64', 'recovered': 'int64',
+          'active': 'int64', 'critical': 'int64', 'todayCases': 'int64',
+          'todayDeaths': 'int64', 'continent': 'string'}
+
+# Timestamp format for the dashboard and report
+TIMESTAMP_FMT = '%Y-%m-%d %H:%M'
+
+# Engine used for the parquet export of the historical timeseries
+ENGINE = 'pyarrow'
 
 class CovidDashboard:
     def __init__(self):
@@ -16,6 +27,12 @@ class CovidDashboard:
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
         
+        # On-disk cache of API responses, keyed by URL
+        self._cache = Cache(self.data_dir)
+        
+        # Shared HTTP session, created on the first fetch
+        self.session = None
+        
         # Data sources
         self.global_data_url = 'https://disease.sh/v3/covid-19/all'
         self.countries_data_url = 'https://disease.sh/v3/covid-19/countries'
@@ -25,46 +42,139 @@ class CovidDashboard:
         self.global_data = None
         self.countries_data = None
         self.historical_data = None
+        self.countries_df = None
         self.top_countries = None
+        self.hist_df = None
+        self.global_death_rate = None
+        self.global_recovery_rate = None
+        
+        # Hash of the raw inputs last seen by process_data
+        self._proc_hash = None
+        
+        # Dashboard figure, reused across renders
+        self._fig = None
+        self._axes = None
+        self._fig_text = None
+        self._date_fmt = None
+        self._date_loc = None
+        
+    def _create_session(self):
+        """Build an HTTP session that pools connections and retries server errors"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util import Retry
+        
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+        session.mount('https://', HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=4))
+        return session
+        
+    def _cached_get(self, url, loader, ttl=600):
+        """Return (data, from_cache) for url, calling loader(url) only on a cache miss"""
+        data = self._cache.get(url)
+        if data is not None:
+            return data, True
+        
+        data = loader(url)
+        self._cache.set(url, data, expire=ttl)
+        return data, False
+        
+    def _fetch_json(self, url):
+        """Fetch url and parse the whole JSON body"""
+        response = self.session.get(url, timeout=(3, 10))
+        response.raise_for_status()
+        return orjson.loads(response.content)
+        
+    def _fetch_countries(self, url):
+        """Stream-parse the countries endpoint, keeping only COUNTRY_COLS for each row"""
+        import ijson
+        
+        with self.session.get(url, timeout=(3, 10), stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return [{k: obj.get(k) for k in COUNTRY_COLS}
+                    for obj in ijson.items(response.raw, 'item', use_float=True)]
+        
+    def _write_json(self, name, data):
+        """Dump data to a JSON file in the data folder"""
+        with open(f'{self.data_dir}/{name}', 'wb') as f:
+            f.write(orjson.dumps(data))
+        
+    def _write_csv(self, df, path):
+        """Write df to CSV (without the index) using pyarrow's C++ writer"""
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        
+        pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+        
+    def _build_countries_df(self):
+        """Build the countries DataFrame from the raw records with explicit dtypes"""
+        df = pd.DataFrame.from_records(self.countries_data, columns=COUNTRY_COLS)
+        # Missing counts become 0 so the integer casts don't fail
+        return df.fillna({col: 0 for col, dtype in DTYPES.items() if dtype == 'int64'}).astype(DTYPES)
+        
+    def _compute_global_rates(self):
+        """Cache the global death and recovery rates (%) on the dashboard"""
+        self.global_death_rate = (self.global_data['deaths'] / self.global_data['cases']) * 100
+        self.global_recovery_rate = (self.global_data['recovered'] / self.global_data['cases']) * 100
         
     def fetch_data(self):
         """Fetch COVID-19 data from API and save locally"""
-        # Fetch global summary
-        response = requests.get(self.global_data_url)
-        self.global_data = response.json()
-        with open(f'{self.data_dir}/global_summary.json', 'w') as f:
-            json.dump(self.global_data, f)
-        
-        # Fetch countries data
-        response = requests.get(self.countries_data_url)
-        self.countries_data = response.json()
-        with open(f'{self.data_dir}/countries_data.json', 'w') as f:
-            json.dump(self.countries_data, f)
-        
-        # Create pandas DataFrame for countries
-        df_countries = pd.DataFrame(self.countries_data)
-        self.countries_df = df_countries
-        df_countries.to_csv(f'{self.data_dir}/countries_data.csv', index=False)
-        
-        # Fetch historical data
-        response = requests.get(self.historical_data_url)
-        self.historical_data = response.json()
-        with open(f'{self.data_dir}/historical_data.json', 'w') as f:
-            json.dump(self.historical_data, f)
+        urls = [self.global_data_url, self.countries_data_url, self.historical_data_url]
+        names = ['global_summary.json', 'countries_data.json', 'historical_data.json']
+        loaders = [self._fetch_json, self._fetch_countries, self._fetch_json]
+        if self.session is None:
+            self.session = self._create_session()
+        
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            # Fetch global summary, countries and historical data concurrently
+            results = list(ex.map(self._cached_get, urls, loaders))
+            (self.global_data, _), (self.countries_data, _), (self.historical_data, _) = results
+            self.global_death_rate = self.global_recovery_rate = None
+            
+            # Save responses locally, unless a cache hit is already on disk
+            writes = [ex.submit(self._write_json, name, data)
+                      for name, (data, cached) in zip(names, results)
+                      if not cached or not os.path.exists(f'{self.data_dir}/{name}')]
+            
+            # Create pandas DataFrame for countries, reused by process_data
+            self.countries_df = self._build_countries_df()
+            csv_path = f'{self.data_dir}/countries_data.csv'
+            if not results[1][1] or not os.path.exists(csv_path):
+                self._write_csv(self.countries_df, csv_path)
+            
+            for w in writes:
+                w.result()
             
         print(f"Data fetched and saved to {self.data_dir}/")
         
-    def process_data(self):
-        """Process raw data for visualization"""
+    def process_data(self, export_csv=False):
+        """Process raw data for visualization (export_csv also writes historical CSVs)"""
         if self.countries_data is None:
             self.load_data()
             
-        # Process countries data
-        df = pd.DataFrame(self.countries_data)
+        # Skip the work if the raw data is unchanged since the last run
+        h = xxhash.xxh3_64(orjson.dumps([self.countries_data, self.historical_data])).intdigest()
+        if h == self._proc_hash and not export_csv:
+            return
+        
+        # Process countries data, reusing the frame built by fetch_data
+        df = self.countries_df
+        if df is None:
+            df = self._build_countries_df()
+            self.countries_df = df
         
         # Get top 10 countries by cases
-        self.top_countries = df.sort_values('cases', ascending=False).head(10)
-        self.top_countries.to_csv(f'{self.data_dir}/top_countries.csv', index=False)
+        tc = df.nlargest(10, 'cases')
+        self._write_csv(tc[COUNTRY_COLS], f'{self.data_dir}/top_countries.csv')
+        
+        # Cache derived rates so visualize_data and generate_report only read them
+        self.top_countries = tc.assign(
+            recovery_rate=tc['recovered'] / tc['cases'] * 100,
+            active_pct=tc['active'] / (tc['recovered'] + tc['active']) * 100,
+        )
+        if self.global_data is not None:
+            self._compute_global_rates()
         
         # Process historical data
         if self.historical_data is not None:
@@ -73,28 +183,37 @@ class CovidDashboard:
             deaths = self.historical_data['deaths']
             recovered = self.historical_data.get('recovered', {})
             
-            # Create timeseries DataFrames
-            self.cases_df = pd.DataFrame.from_dict(cases, orient='index', columns=['cases'])
-            self.deaths_df = pd.DataFrame.from_dict(deaths, orient='index', columns=['deaths'])
-            
+            # Create a single timeseries DataFrame aligned on date, parsing the dates once
+            columns = {'cases': cases, 'deaths': deaths}
             if recovered:
-                self.recovered_df = pd.DataFrame.from_dict(recovered, orient='index', columns=['recovered'])
-                self.recovered_df.to_csv(f'{self.data_dir}/historical_recovered.csv')
+                columns['recovered'] = recovered
+            hist_df = pd.DataFrame(columns)
+            hist_df.index = pd.to_datetime(hist_df.index, format='%m/%d/%y')
+            self.hist_df = hist_df.sort_index()
             
-            self.cases_df.to_csv(f'{self.data_dir}/historical_cases.csv')
-            self.deaths_df.to_csv(f'{self.data_dir}/historical_deaths.csv')
+            # Export only: hist_df is always rebuilt from historical_data
+            self.hist_df.to_parquet(f'{self.data_dir}/historical.parquet', engine=ENGINE)
+            
+            if export_csv:
+                for column in self.hist_df.columns:
+                    self.hist_df[[column]].to_csv(f'{self.data_dir}/historical_{column}.csv')
+        
+        # Only remember the inputs once processing has fully succeeded
+        self._proc_hash = h
             
     def load_data(self):
         """Load data from local files if available"""
         try:
-            with open(f'{self.data_dir}/global_summary.json', 'r') as f:
-                self.global_data = json.load(f)
+            with open(f'{self.data_dir}/global_summary.json', 'rb') as f:
+                self.global_data = orjson.loads(f.read())
+            self.global_death_rate = self.global_recovery_rate = None
                 
-            with open(f'{self.data_dir}/countries_data.json', 'r') as f:
-                self.countries_data = json.load(f)
+            with open(f'{self.data_dir}/countries_data.json', 'rb') as f:
+                self.countries_data = orjson.loads(f.read())
+            self.countries_df = None
                 
-            with open(f'{self.data_dir}/historical_data.json', 'r') as f:
-                self.historical_data = json.load(f)
+            with open(f'{self.data_dir}/historical_data.json', 'rb') as f:
+                self.historical_data = orjson.loads(f.read())
                 
             print("Data loaded from local files")
         except FileNotFoundError:
@@ -102,17 +221,32 @@ class CovidDashboard:
             
     def visualize_data(self):
         """Create visualizations for COVID-19 data"""
+        # Plotting libraries are slow to import, so only load them when needed
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        import matplotlib.dates as mdates
+        from matplotlib.gridspec import GridSpec
+        
         if self.countries_data is None or self.global_data is None:
             print("No data available. Please fetch or load data first.")
             return
             
         # Set style
         sns.set(style="whitegrid")
-        plt.figure(figsize=(16, 12))
-        gs = GridSpec(3, 2)
+        # Build the figure once (or again if its window was closed), then clear it
+        if self._fig is None or not plt.fignum_exists(self._fig.number):
+            self._fig = plt.figure(figsize=(16, 12))
+            self._fig.set_layout_engine('constrained', rect=[0, 0.03, 1, 0.97])
+            gs = GridSpec(3, 2, figure=self._fig)
+            self._axes = [self._fig.add_subplot(gs[i, j]) for i in range(3) for j in range(2)]
+            self._fig_text = self._fig.text(0.5, 0.01, '', ha="center", fontsize=10, style='italic')
+            self._date_fmt = mdates.DateFormatter('%m/%d')
+            self._date_loc = mdates.WeekdayLocator(interval=1)
+        for ax in self._axes:
+            ax.clear()
+        ax1, ax2, ax3, ax4, ax5, ax6 = self._axes
         
         # 1. Global summary
-        ax1 = plt.subplot(gs[0, 0])
         global_metrics = ['cases', 'deaths', 'recovered', 'active']
         values = [self.global_data[metric] for metric in global_metrics]
         ax1.bar(global_metrics, values, color=['#3498db', '#e74c3c', '#2ecc71', '#f39c12'])
@@ -120,72 +254,67 @@ class CovidDashboard:
         for i, v in enumerate(values):
             ax1.text(i, v * 0.9, f"{v:,}", ha='center', fontsize=10)
         
+        # Pull the top-country columns out as NumPy arrays once
+        tc = self.top_countries
+        countries = tc['country'].to_numpy()
+        cases = tc['cases'].to_numpy()
+        deaths = tc['deaths'].to_numpy()
+        recovery_rate = tc['recovery_rate'].to_numpy()
+        active_pct = tc['active_pct'].to_numpy()
+        
         # 2. Top 10 countries by cases
-        ax2 = plt.subplot(gs[0, 1])
-        countries = self.top_countries['country'].values
-        cases = self.top_countries['cases'].values
         ax2.barh(countries[::-1], cases[::-1], color='#3498db')
         ax2.set_title('Top 10 Countries by Cases', fontsize=14)
         for i, v in enumerate(cases[::-1]):
             ax2.text(v * 0.6, i, f"{v:,}", va='center', fontsize=9)
         
         # 3. Cases vs. Deaths for top 10 countries
-        ax3 = plt.subplot(gs[1, 0])
-        deaths = self.top_countries['deaths'].values
-        ax3.scatter(cases, deaths, s=cases/deaths*10, alpha=0.7)
-        for i, country in enumerate(countries):
-            ax3.annotate(country, (cases[i], deaths[i]))
+        # Case/death ratio, left at 0 for countries without recorded deaths
+        ratio = np.divide(cases.astype(float), deaths, out=np.zeros(len(cases)), where=deaths > 0)
+        # Scale sizes linearly to a readable range so the bubbles still differ
+        sizes = np.interp(ratio, (ratio.min(), ratio.max()), (50, 800))
+        ax3.scatter(cases, deaths, s=sizes, alpha=0.7, rasterized=True)
+        for country, xy in zip(countries, zip(cases, deaths)):
+            ax3.annotate(country, xy)
         ax3.set_xlabel('Total Cases')
         ax3.set_ylabel('Total Deaths')
         ax3.set_title('Cases vs Deaths (bubble size = case/death ratio)', fontsize=14)
         
         # 4. Historical data trend
-        ax4 = plt.subplot(gs[1, 1])
-        if hasattr(self, 'cases_df'):
-            dates = pd.to_datetime(self.cases_df.index)
-            ax4.plot(dates, self.cases_df['cases'], label='Cases', color='#3498db')
-            ax4.plot(dates, self.deaths_df['deaths'], label='Deaths', color='#e74c3c')
+        if self.hist_df is not None:
+            dates = self.hist_df.index
+            ax4.plot(dates, self.hist_df['cases'], label='Cases', color='#3498db', rasterized=True)
+            ax4.plot(dates, self.hist_df['deaths'], label='Deaths', color='#e74c3c', rasterized=True)
             ax4.set_title('COVID-19 Trend (Last 30 Days)', fontsize=14)
             ax4.legend()
             # Format x-axis dates
-            ax4.xaxis.set_major_formatter(mdates.DateFormatter('%m/%d'))
-            ax4.xaxis.set_major_locator(mdates.WeekdayLocator(interval=1))
-            plt.xticks(rotation=45)
+            ax4.xaxis.set_major_formatter(self._date_fmt)
+            ax4.xaxis.set_major_locator(self._date_loc)
+            ax4.tick_params(axis='x', labelrotation=45)
         
         # 5. Recovery rate by top countries
-        ax5 = plt.subplot(gs[2, 0])
-        if 'recovered' in self.top_countries.columns:
-            recovery_rate = (self.top_countries['recovered'] / self.top_countries['cases'] * 100).values
-            ax5.barh(countries[::-1], recovery_rate[::-1], color='#2ecc71')
-            ax5.set_title('Recovery Rate by Country (%)', fontsize=14)
-            ax5.set_xlim(0, 100)
-            for i, v in enumerate(recovery_rate[::-1]):
-                ax5.text(v + 2, i, f"{v:.1f}%", va='center', fontsize=9)
+        ax5.barh(countries[::-1], recovery_rate[::-1], color='#2ecc71')
+        ax5.set_title('Recovery Rate by Country (%)', fontsize=14)
+        ax5.set_xlim(0, 100)
+        for i, v in enumerate(recovery_rate[::-1]):
+            ax5.text(v + 2, i, f"{v:.1f}%", va='center', fontsize=9)
         
         # 6. Active vs Recovered proportion
-        ax6 = plt.subplot(gs[2, 1])
-        if 'recovered' in self.top_countries.columns and 'active' in self.top_countries.columns:
-            recovered = self.top_countries['recovered'].values
-            active = self.top_countries['active'].values
-            total = recovered + active
-            recovered_pct = recovered / total * 100
-            active_pct = active / total * 100
-            
-            width = 0.8
-            ax6.barh(countries[::-1], recovered_pct[::-1], width, label='Recovered', color='#2ecc71')
-            ax6.barh(countries[::-1], active_pct[::-1], width, left=recovered_pct[::-1], label='Active', color='#f39c12')
-            ax6.set_title('Active vs Recovered Cases (%)', fontsize=14)
-            ax6.legend(loc='lower right')
-            ax6.set_xlim(0, 100)
+        recovered_pct = 100 - active_pct
+        
+        width = 0.8
+        ax6.barh(countries[::-1], recovered_pct[::-1], width, label='Recovered', color='#2ecc71')
+        ax6.barh(countries[::-1], active_pct[::-1], width, left=recovered_pct[::-1], label='Active', color='#f39c12')
+        ax6.set_title('Active vs Recovered Cases (%)', fontsize=14)
+        ax6.legend(loc='lower right')
+        ax6.set_xlim(0, 100)
         
         # Add timestamp
-        plt.figtext(0.5, 0.01, f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}", 
-                   ha="center", fontsize=10, style='italic')
+        self._fig_text.set_text(f"Generated on {datetime.now().strftime(TIMESTAMP_FMT)}")
         
-        # Adjust layout and save
-        plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-        plt.savefig(f'{self.data_dir}/covid_dashboard.png', dpi=300)
-        plt.savefig(f'{self.data_dir}/covid_dashboard.pdf')
+        # Save (layout is handled by the constrained engine)
+        self._fig.savefig(f'{self.data_dir}/covid_dashboard.png', dpi=150)
+        self._fig.savefig(f'{self.data_dir}/covid_dashboard.pdf', dpi=150)
         print(f"Visualizations saved to {self.data_dir}/")
         plt.show()
         
@@ -195,43 +324,40 @@ class CovidDashboard:
             print("No data available. Please fetch or load data first.")
             return
             
-        report = "COVID-19 PANDEMIC SUMMARY REPORT\n"
-        report += "=" * 30 + "\n\n"
-        report += f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n"
+        parts = []
+        parts.append("COVID-19 PANDEMIC SUMMARY REPORT\n")
+        parts.append("=" * 30 + "\n\n")
+        parts.append(f"Report generated on: {datetime.now().strftime(TIMESTAMP_FMT)}\n\n")
         
         # Global stats
-        report += "GLOBAL STATISTICS\n"
-        report += "-" * 20 + "\n"
-        report += f"Total Cases: {self.global_data['cases']:,}\n"
-        report += f"Total Deaths: {self.global_data['deaths']:,}\n"
-        report += f"Total Recovered: {self.global_data['recovered']:,}\n"
-        report += f"Active Cases: {self.global_data['active']:,}\n"
-        report += f"Critical Cases: {self.global_data.get('critical', 'N/A'):,}\n"
-        report += f"Cases Today: {self.global_data.get('todayCases', 'N/A'):,}\n"
-        report += f"Deaths Today: {self.global_data.get('todayDeaths', 'N/A'):,}\n\n"
+        parts.append("GLOBAL STATISTICS\n")
+        parts.append("-" * 20 + "\n")
+        parts.append(f"Total Cases: {self.global_data['cases']:,}\n")
+        parts.append(f"Total Deaths: {self.global_data['deaths']:,}\n")
+        parts.append(f"Total Recovered: {self.global_data['recovered']:,}\n")
+        parts.append(f"Active Cases: {self.global_data['active']:,}\n")
+        parts.append(f"Critical Cases: {self.global_data.get('critical', 'N/A'):,}\n")
+        parts.append(f"Cases Today: {self.global_data.get('todayCases', 'N/A'):,}\n")
+        parts.append(f"Deaths Today: {self.global_data.get('todayDeaths', 'N/A'):,}\n\n")
         
         # Global rates
-        death_rate = (self.global_data['deaths'] / self.global_data['cases']) * 100
-        recovery_rate = (self.global_data['recovered'] / self.global_data['cases']) * 100
-        report += f"Global Death Rate: {death_rate:.2f}%\n"
-        report += f"Global Recovery Rate: {recovery_rate:.2f}%\n\n"
+        if self.global_death_rate is None:
+            self._compute_global_rates()
+        parts.append(f"Global Death Rate: {self.global_death_rate:.2f}%\n")
+        parts.append(f"Global Recovery Rate: {self.global_recovery_rate:.2f}%\n\n")
         
         # Top countries
-        report += "TOP 10 COUNTRIES BY CASES\n"
-        report += "-" * 30 + "\n"
-        report += f"{'Country':<15} {'Cases':>12} {'Deaths':>10} {'Recovery Rate':>15}\n"
-        
-        for _, row in self.top_countries.iterrows():
-            country = row['country']
-            cases = row['cases']
-            deaths = row['deaths']
-            if 'recovered' in row:
-                recovery = (row['recovered'] / cases * 100)
-                recovery_str = f"{recovery:.1f}%"
-            else:
-                recovery_str = "N/A"
-                
-            report += f"{country:<15} {cases:>12,} {deaths:>10,} {recovery_str:>15}\n"
+        parts.append("TOP 10 COUNTRIES BY CASES\n")
+        parts.append("-" * 30 + "\n")
+        parts.append(f"{'Country':<15} {'Cases':>12} {'Deaths':>10} {'Recovery Rate':>15}\n")
+        
+        # Plain tuples avoid building a Series per row
+        rows = self.top_countries[['country', 'cases', 'deaths', 'recovery_rate']].itertuples(index=False, name=None)
+        for country, cases, deaths, rr in rows:
+            recovery_str = f"{rr:.1f}%" if pd.notna(rr) else "N/A"
+            parts.append(f"{country:<15} {cases:>12,} {deaths:>10,} {recovery_str:>15}\n")
+        
+        report = ''.join(parts)
         
         # Save report
         with open(f'{self.data_dir}/covid_report.txt', 'w') as f:
@@ -262,7 +388,8 @@ def main():
         elif choice == '2':
             dashboard.load_data()
         elif choice == '3':
-            dashboard.process_data()
+            export_csv = input("Also export historical data as CSV? (y/n): ").strip().lower() == 'y'
+            dashboard.process_data(export_csv=export_csv)
         elif choice == '4':
             dashboard.visualize_data()
         elif choice == '5':